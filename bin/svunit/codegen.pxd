@@ -0,0 +1,11 @@
+# Static types for the unit test module scanner, used when codegen.py is
+# compiled with Cython (see setup.py). Ignored by the Python interpreter.
+import cython
+
+@cython.locals(n=Py_ssize_t, c=int, end=Py_ssize_t, newline=bint)
+cpdef tuple _skip_blanks(bytes content, Py_ssize_t pos)
+
+@cython.locals(n=Py_ssize_t, pos=Py_ssize_t, line_start=bint, newline=bint, end=Py_ssize_t,
+               name_start=Py_ssize_t, name_end=Py_ssize_t, semicolon=Py_ssize_t,
+               eol=Py_ssize_t, block=Py_ssize_t, line_comment=Py_ssize_t)
+cpdef _find_unit_test_module(bytes content)
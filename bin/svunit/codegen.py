@@ -1,6 +1,207 @@
-import re
+import string
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
+
+# Unit test files are scanned as bytes, SystemVerilog identifiers are plain ASCII
+_MODULE_KEYWORD = b'module'
+_UNIT_TEST_SUFFIX = b'_unit_test'
+# Lifetime keywords are ignored when looking for the module declaration
+_LIFETIME_KEYWORDS = (b'static', b'automatic')
+_WHITESPACE = frozenset(string.whitespace.encode('ascii'))
+_WORD_CHARS = frozenset((string.ascii_letters + string.digits + '_').encode('ascii'))
+_NEWLINE = ord('\n')
+
+# Generated file templates, filled in with str.format_map() by SvUnitCodeGen
+_TESTSUITE_TEMPLATE = """\
+module {class_name};
+  import svunit_pkg::svunit_testsuite;
+
+  string name = "{instance_name}";
+  svunit_testsuite svunit_ts;
+\x20\x20
+\x20\x20
+  //===================================
+  // These are the unit tests that we
+  // want included in this testsuite
+  //===================================
+{decls}
+
+  //===================================
+  // Build
+  //===================================
+  function void build();
+{builds}    svunit_ts = new(name);
+{adds}  endfunction
+
+
+  //===================================
+  // Run
+  //===================================
+  task run();
+    svunit_ts.run();
+{runs}    svunit_ts.report();
+  endtask
+
+endmodule
+"""
+
+_TESTRUNNER_TEMPLATE = """
+module {class_name}();
+  import svunit_pkg::svunit_testrunner;
+`ifdef RUN_SVUNIT_WITH_UVM
+  import uvm_pkg::*;
+  import svunit_uvm_mock_pkg::svunit_uvm_test_inst;
+  import svunit_uvm_mock_pkg::uvm_report_mock;
+`endif
+
+  string name = "{class_name}";
+  svunit_testrunner svunit_tr;
+
+
+  //==================================
+  // These are the test suites that we
+  // want included in this testrunner
+  //==================================
+{decls}
+
+  //===================================
+  // Main
+  //===================================
+  initial
+  begin
+
+    `ifdef RUN_SVUNIT_WITH_UVM_REPORT_MOCK
+      uvm_report_cb::add(null, uvm_report_mock::reports);
+    `endif
+
+    build();
+
+    `ifdef RUN_SVUNIT_WITH_UVM
+      svunit_uvm_test_inst("svunit_uvm_test");
+    `endif
+
+    run();
+    $finish();
+  end
+
+
+  //===================================
+  // Build
+  //===================================
+  function void build();
+    svunit_tr = new(name);
+{builds}  endfunction
+
+
+  //===================================
+  // Run
+  //===================================
+  task run();
+{runs}    svunit_tr.report();
+  endtask
+
+
+endmodule
+"""
+
+
+def _skip_blanks(content: bytes, pos: int) -> Tuple[int, bool]:
+    """
+    Skips whitespace, comments and lifetime keywords starting at pos.
+    Returns the position of the next token and whether a line break was crossed.
+    """
+    n = len(content)
+    newline = False
+    while pos < n:
+        c = content[pos]
+        if c in _WHITESPACE:
+            newline = newline or c == _NEWLINE
+            pos += 1
+        elif content.startswith(b'//', pos):
+            end = content.find(b'\n', pos)
+            if end == -1:
+                return n, newline
+            pos = end
+        elif content.startswith(b'/*', pos):
+            end = content.find(b'*/', pos + 2)
+            if end == -1:
+                return n, newline
+            pos = end + 2
+        else:
+            for keyword in _LIFETIME_KEYWORDS:
+                end = pos + len(keyword)
+                if content.startswith(keyword, pos) and not (end < n and content[end] in _WORD_CHARS):
+                    pos = end
+                    break
+            else:
+                return pos, newline
+    return n, newline
+
+
+def _write_if_changed(output_file: Path, content: bytes):
+    """
+    Writes content to output_file unless the file already holds exactly that content.
+    An unchanged file keeps its timestamp, so incremental compiles can skip it.
+    """
+    try:
+        with open(output_file, 'rb') as f:
+            if f.read() == content:
+                return
+    except FileNotFoundError:
+        pass
+    # Written as bytes in one go, bypassing the text layer
+    with open(output_file, 'wb') as f:
+        f.write(content)
+
+
+def _find_unit_test_module(content: bytes) -> Optional[str]:
+    """
+    Single pass scanner looking for the first 'module <name>_unit_test;' declaration
+    at the start of a line, ignoring anything inside comments.
+    """
+    # Cheap rejection of files that can't contain a unit test module at all
+    if content.find(_UNIT_TEST_SUFFIX) == -1:
+        return None
+
+    n = len(content)
+    pos = 0
+    line_start = True
+    while True:
+        pos, newline = _skip_blanks(content, pos)
+        line_start = line_start or newline
+        if pos >= n:
+            return None
+
+        if line_start and content.startswith(_MODULE_KEYWORD, pos):
+            end = pos + len(_MODULE_KEYWORD)
+            name_start, _ = _skip_blanks(content, end)
+            if name_start > end and content[end] not in _WORD_CHARS:
+                name_end = name_start
+                while name_end < n and content[name_end] in _WORD_CHARS:
+                    name_end += 1
+                name = content[name_start:name_end]
+                semicolon, _ = _skip_blanks(content, name_end)
+                if (len(name) > len(_UNIT_TEST_SUFFIX) and name.endswith(_UNIT_TEST_SUFFIX)
+                        and content.startswith(b';', semicolon)):
+                    return name.decode('ascii')
+
+        # Not a unit test declaration, jump to the start of the next line
+        line_start = False
+        while True:
+            eol = content.find(b'\n', pos)
+            if eol == -1:
+                return None
+            block = content.find(b'/*', pos, eol)
+            line_comment = content.find(b'//', pos, eol)
+            if block == -1 or (line_comment != -1 and line_comment < block):
+                pos = eol
+                break
+            # Line breaks inside block comments don't start a new line
+            pos = content.find(b'*/', block + 2)
+            if pos == -1:
+                return None
+            pos += 2
+
 
 class SvUnitCodeGen:
     def __init__(self):
@@ -10,25 +211,10 @@ class SvUnitCodeGen:
         """
         Parses the unit test file to find the module name.
         """
-        with open(file_path, 'r') as f:
+        with open(file_path, 'rb') as f:
             content = f.read()
 
-        # Remove comments
-        # Remove // comments
-        content = re.sub(r'//.*', '', content)
-        # Remove /* */ comments
-        content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-
-        # Remove static/automatic keywords (simple approach based on Perl script)
-        content = re.sub(r'\bstatic\b', '', content)
-        content = re.sub(r'\bautomatic\b', '', content)
-
-        # Find module name
-        match = re.search(r'^\s*module\s+(\w+_unit_test)\s*;', content, flags=re.MULTILINE)
-        if match:
-            return match.group(1)
-        
-        return None
+        return _find_unit_test_module(content)
 
     def create_testsuite(self, output_file: Path, unit_tests: List[Path]):
         """
@@ -40,62 +226,27 @@ class SvUnitCodeGen:
         
         instance_name = class_name.replace('_testsuite', '_ts')
 
-        unit_test_classes = []
-        unit_test_instances = []
+        # (unit test module, instance name) pairs
+        unit_test_pairs = []
 
         for ut in unit_tests:
             module_name = self._parse_unit_test_name(ut)
             if module_name:
-                unit_test_classes.append(module_name)
-                unit_test_instances.append(module_name.replace('_unit_test', '_ut'))
+                unit_test_pairs.append((module_name, module_name.replace('_unit_test', '_ut')))
             else:
                 print(f"Warning: Could not find module name in {ut}")
 
-        with open(output_file, 'w') as f:
-            f.write(f"module {class_name};\n")
-            f.write("  import svunit_pkg::svunit_testsuite;\n\n")
-            f.write(f"  string name = \"{instance_name}\";\n")
-            f.write("  svunit_testsuite svunit_ts;\n")
-            f.write("  \n")
-            f.write("  \n")
-            f.write("  //===================================\n")
-            f.write("  // These are the unit tests that we\n")
-            f.write("  // want included in this testsuite\n")
-            f.write("  //===================================\n")
-            
-            for cls, inst in zip(unit_test_classes, unit_test_instances):
-                f.write(f"  {cls} {inst}();\n")
-            
-            f.write("\n\n")
-            f.write("  //===================================\n")
-            f.write("  // Build\n")
-            f.write("  //===================================\n")
-            f.write("  function void build();\n")
-            
-            for inst in unit_test_instances:
-                f.write(f"    {inst}.build();\n")
-                f.write(f"    {inst}.__register_tests();\n")
-            
-            f.write(f"    svunit_ts = new(name);\n")
-            
-            for inst in unit_test_instances:
-                f.write(f"    svunit_ts.add_testcase({inst}.svunit_ut);\n")
-            
-            f.write("  endfunction\n\n")
-            
-            f.write("\n")
-            f.write("  //===================================\n")
-            f.write("  // Run\n")
-            f.write("  //===================================\n")
-            f.write("  task run();\n")
-            f.write("    svunit_ts.run();\n")
-            
-            for inst in unit_test_instances:
-                f.write(f"    {inst}.run();\n")
-            
-            f.write("    svunit_ts.report();\n")
-            f.write("  endtask\n\n")
-            f.write("endmodule\n")
+        # Each section listing the unit tests is built as one string
+        content = _TESTSUITE_TEMPLATE.format_map({
+            "class_name": class_name,
+            "instance_name": instance_name,
+            "decls": "".join(f"  {cls} {inst}();\n" for cls, inst in unit_test_pairs),
+            "builds": "".join(f"    {inst}.build();\n    {inst}.__register_tests();\n" for _, inst in unit_test_pairs),
+            "adds": "".join(f"    svunit_ts.add_testcase({inst}.svunit_ut);\n" for _, inst in unit_test_pairs),
+            "runs": "".join(f"    {inst}.run();\n" for _, inst in unit_test_pairs),
+        })
+
+        _write_if_changed(output_file, content.encode('utf-8'))
 
     def create_testrunner(self, output_file: Path, test_suites: List[Path]):
         """
@@ -115,68 +266,11 @@ class SvUnitCodeGen:
             suite_classes.append(name)
             suite_instances.append(name.replace('_testsuite', '_ts'))
 
-        with open(output_file, 'w') as f:
-            f.write("\n")
-            f.write(f"module {class_name}();\n")
-            f.write("  import svunit_pkg::svunit_testrunner;\n")
-            f.write("`ifdef RUN_SVUNIT_WITH_UVM\n")
-            f.write("  import uvm_pkg::*;\n")
-            f.write("  import svunit_uvm_mock_pkg::svunit_uvm_test_inst;\n")
-            f.write("  import svunit_uvm_mock_pkg::uvm_report_mock;\n")
-            f.write("`endif\n\n")
-            f.write(f"  string name = \"{class_name}\";\n")
-            f.write("  svunit_testrunner svunit_tr;\n\n\n")
-            f.write("  //==================================\n")
-            f.write("  // These are the test suites that we\n")
-            f.write("  // want included in this testrunner\n")
-            f.write("  //==================================\n")
-            
-            for cls, inst in zip(suite_classes, suite_instances):
-                f.write(f"  {cls} {inst}();\n")
-            
-            f.write("\n\n")
-            f.write("  //===================================\n")
-            f.write("  // Main\n")
-            f.write("  //===================================\n")
-            f.write("  initial\n")
-            f.write("  begin\n")
-            f.write("\n")
-            f.write("    `ifdef RUN_SVUNIT_WITH_UVM_REPORT_MOCK\n")
-            f.write("      uvm_report_cb::add(null, uvm_report_mock::reports);\n")
-            f.write("    `endif\n")
-            f.write("\n")
-            f.write("    build();\n")
-            f.write("\n")
-            f.write("    `ifdef RUN_SVUNIT_WITH_UVM\n")
-            f.write("      svunit_uvm_test_inst(\"svunit_uvm_test\");\n")
-            f.write("    `endif\n")
-            f.write("\n")
-            f.write("    run();\n")
-            f.write("    $finish();\n")
-            f.write("  end\n")
-            
-            f.write("\n\n")
-            f.write("  //===================================\n")
-            f.write("  // Build\n")
-            f.write("  //===================================\n")
-            f.write("  function void build();\n")
-            f.write("    svunit_tr = new(name);\n")
-            
-            for inst in suite_instances:
-                f.write(f"    {inst}.build();\n")
-                f.write(f"    svunit_tr.add_testsuite({inst}.svunit_ts);\n")
-            
-            f.write("  endfunction\n\n\n")
-            
-            f.write("  //===================================\n")
-            f.write("  // Run\n")
-            f.write("  //===================================\n")
-            f.write("  task run();\n")
-            
-            for inst in suite_instances:
-                f.write(f"    {inst}.run();\n")
-            
-            f.write("    svunit_tr.report();\n")
-            f.write("  endtask\n")
-            f.write("\n\n")
-            f.write("endmodule\n")
+        content = _TESTRUNNER_TEMPLATE.format_map({
+            "class_name": class_name,
+            "decls": "".join(f"  {cls} {inst}();\n" for cls, inst in zip(suite_classes, suite_instances)),
+            "builds": "".join(f"    {inst}.build();\n    svunit_tr.add_testsuite({inst}.svunit_ts);\n" for inst in suite_instances),
+            "runs": "".join(f"    {inst}.run();\n" for inst in suite_instances),
+        })
+
+        _write_if_changed(output_file, content.encode('utf-8'))
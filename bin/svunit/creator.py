@@ -1,8 +1,153 @@
 import argparse
-import re
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
+
+try:
+    # google-re2 is an optional, DFA based drop-in for the patterns below.
+    # Flags are given inline since re2 doesn't provide the re flag constants.
+    import re2 as re
+except ImportError:
+    import re
+
+# UUT files are parsed as bytes, only the captured identifiers are decoded
+# Line and block comments are removed in one pass, whichever starts first wins
+_COMMENT_RE = re.compile(rb'(?s)//[^\n]*|/\*.*?\*/')
+# Matches the start of a class/module/interface declaration or any of the end keywords
+_DECL_RE = re.compile(
+    rb'(?m)^\s*(class\s+(?:virtual\s+)?(\w+)'
+    rb'|module\s+(?:automatic\s+|static\s+)?(\w+)'
+    rb'|interface\s+(?:automatic\s+|static\s+)?(\w+)'
+    rb'|end(class|module|interface))\b')
+
+# Unit test templates, filled in with str.format_map() by UnitTestCreator._create_unit_test
+_UNIT_TEST_TEMPLATE = """\
+{uvm_import}
+{uvm_wrapper}module {uut_name}_unit_test;
+  import svunit_pkg::svunit_testcase;
+
+  string name = "{uut_name}_ut";
+  svunit_testcase svunit_ut;
+
+
+  //===================================
+  // This is the UUT that we're\x20
+  // running the Unit Tests on
+  //===================================
+  {uut_class} my_{uut_name}{uut_ports};
+
+
+  //===================================
+  // Build
+  //===================================
+  function void build();
+    svunit_ut = new(name);
+{uut_build}  endfunction
+
+
+  //===================================
+  // Setup for running the Unit Tests
+  //===================================
+  task setup();
+    svunit_ut.setup();
+    /* Place Setup Code Here */
+
+{uvm_setup}  endtask
+
+
+  //===================================
+  // Here we deconstruct anything we\x20
+  // need after running the Unit Tests
+  //===================================
+  task teardown();
+    svunit_ut.teardown();
+{uvm_teardown}    /* Place Teardown Code Here */
+
+{uvm_deactivate}  endtask
+
+
+  //===================================
+  // All tests are defined between the
+  // SVUNIT_TESTS_BEGIN/END macros
+  //
+  // Each individual test must be
+  // defined between `SVTEST(_NAME_)
+  // `SVTEST_END
+  //
+  // i.e.
+  //   `SVTEST(mytest)
+  //     <test code>
+  //   `SVTEST_END
+  //===================================
+  `SVUNIT_TESTS_BEGIN
+
+
+
+  `SVUNIT_TESTS_END
+
+endmodule
+"""
+
+_UVM_PREAMBLE = """\
+class {uvm_class_name} extends {uut_name};
+
+  `uvm_component_utils({uvm_class_name})
+  function new(string name = "{uvm_class_name}", uvm_component parent);
+    super.new(name, parent);
+  endfunction
+
+  //===================================
+  // Build
+  //===================================
+  function void build_phase(uvm_phase phase);
+     super.build_phase(phase);
+    /* Place Build Code Here */
+  endfunction
+
+  //==================================
+  // Connect
+  //=================================
+  function void connect_phase(uvm_phase phase);
+    super.connect_phase(phase);
+    /* Place Connection Code Here */
+  endfunction
+endclass
+
+"""
+
+_CLASS_BUILD = """
+    my_{uut_name} = new(/* New arguments if needed */);
+"""
+
+_UVM_CLASS_BUILD = """
+    my_{uut_name} = {uvm_class_name}::type_id::create("", null);
+
+    svunit_deactivate_uvm_component(my_{uut_name});
+"""
+
+_UVM_SETUP = """\
+    svunit_activate_uvm_component(my_{uut_name});
+
+    //-----------------------------
+    // start the testing phase
+    //-----------------------------
+    svunit_uvm_test_start();
+
+
+
+"""
+
+_UVM_TEARDOWN = """\
+    //-----------------------------
+    // terminate the testing phase\x20
+    //-----------------------------
+    svunit_uvm_test_finish();
+
+"""
+
+_UVM_DEACTIVATE = """\
+    svunit_deactivate_uvm_component(my_{uut_name});
+"""
 
 class UnitTestCreator:
     def __init__(self, uut_file: Optional[str], output_file: Optional[str], 
@@ -64,218 +209,95 @@ class UnitTestCreator:
         return True
 
     def _process_file(self):
-        if self.uut_file:
-            try:
-                with open(self.uut_file, 'r') as f:
-                    content = f.read()
-            except FileNotFoundError:
-                print(f"Cannot Open file {self.uut_file}")
-                return
-
-            # Remove comments
-            content = re.sub(r'//.*', '', content)
-            content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-
-            # Simple parsing logic similar to Perl script
-            # It seems the Perl script processes line by line but handles multi-line comments statefully.
-            # Here we removed comments globally, so we can just search for patterns.
-            
-            # Regex patterns
-            class_pattern = re.compile(r'^\s*class\s+(?:virtual\s+)?(\w+)', re.MULTILINE)
-            module_pattern = re.compile(r'^\s*module\s+(?:automatic\s+|static\s+)?(\w+)', re.MULTILINE)
-            interface_pattern = re.compile(r'^\s*interface\s+(?:automatic\s+|static\s+)?(\w+)', re.MULTILINE)
-
-            # We need to handle multiple definitions in one file?
-            # The Perl script seems to iterate and call CreateUnitTest for each endclass/endmodule/endinterface
-            # But it also sets $uut based on the start.
-            
-            # Let's iterate lines to mimic the flow if we want to support multiple units in one file
-            # Or we can just find all matches.
-            
-            # Re-reading line by line to match Perl logic more closely for multiple units
-            lines = content.splitlines()
-            
-            current_uut = None
-            current_type = None
-            
-            with open(self.output_file, 'w') as out:
-                self.out_handle = out
-                
-                for line in lines:
-                    # Check for start
-                    m_class = class_pattern.search(line)
-                    m_module = module_pattern.search(line)
-                    m_if = interface_pattern.search(line)
-                    
-                    if m_class:
-                        current_uut = m_class.group(1)
-                        current_type = 'class'
-                    elif m_module:
-                        current_uut = m_module.group(1)
-                        current_type = 'module'
-                    elif m_if:
-                        current_uut = m_if.group(1)
-                        current_type = 'interface'
-                    
-                    # Check for end
-                    if current_type == 'class' and re.search(r'^\s*endclass', line):
-                        self._create_unit_test(current_uut, current_type)
-                        current_uut = None
-                        current_type = None
-                    elif current_type == 'module' and re.search(r'^\s*endmodule', line):
-                        self._create_unit_test(current_uut, current_type)
-                        current_uut = None
-                        current_type = None
-                    elif current_type == 'interface' and re.search(r'^\s*endinterface', line):
-                        self._create_unit_test(current_uut, current_type)
-                        current_uut = None
-                        current_type = None
-
-        # If command line arguments specified the name directly
+        # A name given on the command line takes precedence over parsing the UUT file,
+        # so the output file is written by exactly one code path
         if self.class_name:
-            with open(self.output_file, 'w') as out:
-                self.out_handle = out
-                self._create_unit_test(self.class_name, 'class')
+            units = [(self.class_name, 'class')]
         elif self.module_name:
-            with open(self.output_file, 'w') as out:
-                self.out_handle = out
-                self._create_unit_test(self.module_name, 'module')
+            units = [(self.module_name, 'module')]
         elif self.if_name:
-            with open(self.output_file, 'w') as out:
-                self.out_handle = out
-                self._create_unit_test(self.if_name, 'interface')
+            units = [(self.if_name, 'interface')]
+        else:
+            units = self._parse_uut_file()
+            if units is None:
+                return
+
+        with open(self.output_file, 'wb') as out:
+            self.out_handle = out
+            for uut_name, uut_type in units:
+                self._create_unit_test(uut_name, uut_type)
+
+    def _parse_uut_file(self) -> Optional[List[Tuple[str, str]]]:
+        """
+        Returns the (name, type) of every class, module and interface in the UUT file,
+        or None if the file can't be opened.
+        """
+        try:
+            with open(self.uut_file, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            print(f"Cannot Open file {self.uut_file}")
+            return None
+
+        # Remove comments
+        content = _COMMENT_RE.sub(b'', content)
+
+        # The Perl script calls CreateUnitTest for each endclass/endmodule/endinterface
+        # matching the most recent declaration, so multiple units in one file are supported.
+        # Comments are already removed, so the declarations can be matched on the whole content.
+        units = []
+        current_uut = None
+        current_type = None
+
+        for m in _DECL_RE.finditer(content):
+            if m.group(2):
+                current_uut = m.group(2).decode('ascii')
+                current_type = 'class'
+            elif m.group(3):
+                current_uut = m.group(3).decode('ascii')
+                current_type = 'module'
+            elif m.group(4):
+                current_uut = m.group(4).decode('ascii')
+                current_type = 'interface'
+            elif current_type and m.group(5).decode('ascii') == current_type:
+                units.append((current_uut, current_type))
+                current_uut = None
+                current_type = None
+
+        return units
 
     def _create_unit_test(self, uut_name: str, uut_type: str):
-        uvm_class_name = f"{uut_name}_uvm_wrapper"
-        
+        parts = []
+
         if not self.includes_already_printed:
-            self.out_handle.write('`include "svunit_defines.svh"\n')
+            parts.append('`include "svunit_defines.svh"\n')
             if self.uvm:
-                self.out_handle.write('import uvm_pkg::*;\n')
+                parts.append('import uvm_pkg::*;\n')
             
             if self.package:
-                self.out_handle.write(f'  import {self.package};\n')
+                parts.append(f'  import {self.package};\n')
             elif self.uut_file:
-                self.out_handle.write(f'`include "{self.uut_file.name}"\n')
+                parts.append(f'`include "{self.uut_file.name}"\n')
             
             self.includes_already_printed = True
 
-        if self.uvm:
-            self.out_handle.write('  import svunit_uvm_mock_pkg::*;\n')
-        
-        self.out_handle.write('\n')
-        
-        if self.uvm:
-            self._create_uvm_class_for_test(uvm_class_name, uut_name)
-            
-        self.out_handle.write(f'module {uut_name}_unit_test;\n')
-        self.out_handle.write('  import svunit_pkg::svunit_testcase;\n\n')
-        self.out_handle.write(f'  string name = "{uut_name}_ut";\n')
-        self.out_handle.write('  svunit_testcase svunit_ut;\n\n\n')
-        
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write("  // This is the UUT that we're \n")
-        self.out_handle.write('  // running the Unit Tests on\n')
-        self.out_handle.write('  //===================================\n')
-        
+        names = {"uut_name": uut_name, "uvm_class_name": f"{uut_name}_uvm_wrapper"}
         if uut_type == 'class':
-            if self.uvm:
-                self.out_handle.write(f'  {uvm_class_name} my_{uut_name};\n\n\n')
-            else:
-                self.out_handle.write(f'  {uut_name} my_{uut_name};\n\n\n')
+            uut_build = (_UVM_CLASS_BUILD if self.uvm else _CLASS_BUILD).format_map(names)
         else:
-            if self.uvm:
-                self.out_handle.write(f'  {uvm_class_name} my_{uut_name}();\n\n\n')
-            else:
-                self.out_handle.write(f'  {uut_name} my_{uut_name}();\n\n\n')
-
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  // Build\n')
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  function void build();\n')
-        self.out_handle.write('    svunit_ut = new(name);\n')
-        
-        if uut_type == 'class':
-            self.out_handle.write('\n')
-            if self.uvm:
-                self.out_handle.write(f'    my_{uut_name} = {uvm_class_name}::type_id::create("", null);\n')
-                self.out_handle.write(f'\n    svunit_deactivate_uvm_component(my_{uut_name});\n')
-            else:
-                self.out_handle.write(f'    my_{uut_name} = new(/* New arguments if needed */);\n')
-        
-        self.out_handle.write('  endfunction\n\n\n')
-        
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  // Setup for running the Unit Tests\n')
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  task setup();\n')
-        self.out_handle.write('    svunit_ut.setup();\n')
-        self.out_handle.write('    /* Place Setup Code Here */\n\n')
-        
-        if self.uvm:
-            self.out_handle.write(f'    svunit_activate_uvm_component(my_{uut_name});\n\n')
-            self.out_handle.write('    //-----------------------------\n')
-            self.out_handle.write('    // start the testing phase\n')
-            self.out_handle.write('    //-----------------------------\n')
-            self.out_handle.write('    svunit_uvm_test_start();\n\n\n\n')
-            
-        self.out_handle.write('  endtask\n\n\n')
-        
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  // Here we deconstruct anything we \n')
-        self.out_handle.write('  // need after running the Unit Tests\n')
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  task teardown();\n')
-        self.out_handle.write('    svunit_ut.teardown();\n')
-        
-        if self.uvm:
-            self.out_handle.write('    //-----------------------------\n')
-            self.out_handle.write('    // terminate the testing phase \n')
-            self.out_handle.write('    //-----------------------------\n')
-            self.out_handle.write('    svunit_uvm_test_finish();\n\n')
-        
-        self.out_handle.write('    /* Place Teardown Code Here */\n\n')
-        
-        if self.uvm:
-            self.out_handle.write(f'    svunit_deactivate_uvm_component(my_{uut_name});\n')
-            
-        self.out_handle.write('  endtask\n\n\n')
-        
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  // All tests are defined between the\n')
-        self.out_handle.write('  // SVUNIT_TESTS_BEGIN/END macros\n')
-        self.out_handle.write('  //\n')
-        self.out_handle.write('  // Each individual test must be\n')
-        self.out_handle.write('  // defined between `SVTEST(_NAME_)\n')
-        self.out_handle.write('  // `SVTEST_END\n')
-        self.out_handle.write('  //\n')
-        self.out_handle.write('  // i.e.\n')
-        self.out_handle.write('  //   `SVTEST(mytest)\n')
-        self.out_handle.write('  //     <test code>\n')
-        self.out_handle.write('  //   `SVTEST_END\n')
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  `SVUNIT_TESTS_BEGIN\n\n\n\n')
-        self.out_handle.write('  `SVUNIT_TESTS_END\n\n')
-        self.out_handle.write('endmodule\n')
-
-    def _create_uvm_class_for_test(self, uvm_class_name: str, uut_name: str):
-        self.out_handle.write(f'class {uvm_class_name} extends {uut_name};\n\n')
-        self.out_handle.write(f'  `uvm_component_utils({uvm_class_name})\n')
-        self.out_handle.write(f'  function new(string name = "{uvm_class_name}", uvm_component parent);\n')
-        self.out_handle.write('    super.new(name, parent);\n')
-        self.out_handle.write('  endfunction\n\n')
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  // Build\n')
-        self.out_handle.write('  //===================================\n')
-        self.out_handle.write('  function void build_phase(uvm_phase phase);\n')
-        self.out_handle.write('     super.build_phase(phase);\n')
-        self.out_handle.write('    /* Place Build Code Here */\n')
-        self.out_handle.write('  endfunction\n\n')
-        self.out_handle.write('  //==================================\n')
-        self.out_handle.write('  // Connect\n')
-        self.out_handle.write('  //=================================\n')
-        self.out_handle.write('  function void connect_phase(uvm_phase phase);\n')
-        self.out_handle.write('    super.connect_phase(phase);\n')
-        self.out_handle.write('    /* Place Connection Code Here */\n')
-        self.out_handle.write('  endfunction\n')
-        self.out_handle.write('endclass\n\n')
+            uut_build = ''
+
+        parts.append(_UNIT_TEST_TEMPLATE.format_map({
+            **names,
+            "uvm_import": '  import svunit_uvm_mock_pkg::*;\n' if self.uvm else '',
+            "uvm_wrapper": _UVM_PREAMBLE.format_map(names) if self.uvm else '',
+            "uut_class": names["uvm_class_name"] if self.uvm else uut_name,
+            "uut_ports": '' if uut_type == 'class' else '()',
+            "uut_build": uut_build,
+            "uvm_setup": _UVM_SETUP.format_map(names) if self.uvm else '',
+            "uvm_teardown": _UVM_TEARDOWN if self.uvm else '',
+            "uvm_deactivate": _UVM_DEACTIVATE.format_map(names) if self.uvm else '',
+        }))
+
+        # The output file is binary, each unit test is encoded and written in one go
+        self.out_handle.write(''.join(parts).encode('utf-8'))
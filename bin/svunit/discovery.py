@@ -1,7 +1,22 @@
 import os
 import glob
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+
+def _list_directory(path: str) -> List[os.DirEntry]:
+    """
+    Lists a directory, skipping directories that can't be read like Path.rglob does.
+    """
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except (NotADirectoryError, PermissionError):
+        return []
+
+
+_UNIT_TEST_SUFFIX = "_unit_test.sv"
 
 class TestDiscovery:
     def __init__(self, directories: Optional[List[str]] = None, tests: Optional[List[str]] = None):
@@ -12,9 +27,16 @@ class TestDiscovery:
             directories: List of directories to search for tests. If None, defaults to current directory.
             tests: List of specific test names to look for.
         """
-        self.directories = [Path(d).resolve() for d in directories] if directories else [Path.cwd()]
+        # Directories are resolved once and kept as strings for os.scandir
+        self.directories = [os.path.realpath(d) for d in directories] if directories else [os.getcwd()]
         self.tests = tests
+        # File names to try for each requested test, the _unit_test.sv suffix is optional
+        self._test_candidates = [
+            (test,) if test.endswith(_UNIT_TEST_SUFFIX) else (test, f"{test}{_UNIT_TEST_SUFFIX}")
+            for test in tests
+        ] if tests else []
         self.found_tests = []
+        self.suites = {}
 
     def discover(self) -> List[Path]:
         """
@@ -24,54 +46,83 @@ class TestDiscovery:
             List of paths to the found unit test files.
         """
         self.found_tests = []
-        for directory in self.directories:
-            self._find_tests_in_directory(directory)
+        self.suites = {}
+        # Walking the directory trees is bound by file system latency, so independent
+        # trees are searched concurrently. map() keeps the order of self.directories.
+        with ThreadPoolExecutor(max_workers=min(32, len(self.directories))) as executor:
+            # Overlapping directories (e.g. a directory and one of its children) would
+            # report the same tests more than once. The directories are resolved and
+            # the walk doesn't follow symlinks, so equal tests have equal paths.
+            seen = set()
+            for tests in executor.map(self._find_tests_in_directory, self.directories):
+                for suite_dir, test_file in tests:
+                    if test_file in seen:
+                        continue
+                    seen.add(test_file)
+                    # Path objects are only created for the results handed out to callers
+                    test_path = Path(test_file)
+                    self.found_tests.append(test_path)
+                    self.suites.setdefault(suite_dir, []).append(test_path)
         return self.found_tests
 
-    def _find_tests_in_directory(self, directory: Path):
+    def discover_test_suites(self) -> Tuple[List[Path], Dict[Path, List[Path]]]:
+        """
+        Discover unit tests and group them into test suites in a single walk.
+
+        Returns:
+            The found unit test files and the test suites as returned by get_test_suites().
+        """
+        found_tests = self.discover()
+        return found_tests, self.get_test_suites()
+
+    def _find_tests_in_directory(self, directory: str) -> List[Tuple[str, str]]:
         """
         Recursively find tests in a directory.
+        Returns (suite directory, test file) pairs, so that directories can be searched
+        in parallel and the tests grouped into suites without another pass.
         """
-        if not directory.exists():
+        found_tests = []
+        if not os.path.exists(directory):
             print(f"Warning: Directory {directory} does not exist.")
-            return
+            return found_tests
 
         # If specific tests are requested
         if self.tests:
-            for test in self.tests:
-                test_path = directory / test
-                if test_path.exists():
-                    self.found_tests.append(test_path)
-                else:
-                    # Check if it exists with _unit_test.sv suffix if not provided
-                    if not test.endswith("_unit_test.sv"):
-                        test_path_suffix = directory / f"{test}_unit_test.sv"
-                        if test_path_suffix.exists():
-                            self.found_tests.append(test_path_suffix)
-                            continue
-                    
-                    # If we are here, we haven't found the test in this directory.
-                    # However, we shouldn't error out immediately because it might be in a subdirectory
-                    # or another directory in the list.
-                    # But the original Perl script seems to error if a specified test is not found in the dir.
-                    # Let's stick to finding all matching files recursively if no specific test is given,
-                    # or checking specific paths if tests are given.
-                    pass
+            # Look the tests up in one listing of the directory instead of a stat() per test.
+            # Tests that aren't found here might still be found in another directory of the list.
+            names = {entry.name for entry in _list_directory(directory)}
+            for candidates in self._test_candidates:
+                for name in candidates:
+                    if name in names:
+                        found_tests.append((directory, os.path.join(directory, name)))
+                        break
+                    # Names with a directory part can't be looked up in the listing
+                    test_file = os.path.normpath(os.path.join(directory, name))
+                    if os.path.dirname(name) and os.path.exists(test_file):
+                        found_tests.append((os.path.dirname(test_file), test_file))
+                        break
         else:
             # Find all *_unit_test.sv files
-            # Using rglob for recursive search
-            for test_file in directory.rglob("*_unit_test.sv"):
-                self.found_tests.append(test_file)
+            # Using an os.scandir based depth-first walk on plain strings, which reuses the
+            # directory entry information and the path of the directory being listed
+            stack = [directory]
+            while stack:
+                current = stack.pop()
+                subdirs = []
+                for entry in _list_directory(current):
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.endswith(_UNIT_TEST_SUFFIX):
+                        found_tests.append((current, entry.path))
+                # Keep the pre-order traversal of rglob
+                stack.extend(reversed(subdirs))
+
+        return found_tests
 
-    def get_test_suites(self):
+    def get_test_suites(self) -> Dict[Path, List[Path]]:
         """
         Group found tests by directory to form test suites.
         Returns a dictionary where keys are directory paths and values are lists of test files.
+        The grouping is done while discovering the tests.
         """
-        suites = {}
-        for test_file in self.found_tests:
-            parent_dir = test_file.parent
-            if parent_dir not in suites:
-                suites[parent_dir] = []
-            suites[parent_dir].append(test_file)
-        return suites
+        return {Path(suite_dir): tests for suite_dir, tests in self.suites.items()}
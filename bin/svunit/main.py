@@ -1,13 +1,30 @@
 import argparse
 import sys
 import os
+from functools import lru_cache
 from pathlib import Path
 from svunit.discovery import TestDiscovery
 from svunit.codegen import SvUnitCodeGen
 from svunit.simulators import get_simulator, detect_simulator
 from svunit.creator import UnitTestCreator
 
-def main():
+# Characters of a suite directory that are replaced to form its testsuite name
+_DIR_ID_TABLE = str.maketrans('/.-', '___')
+
+# Used when SVUNIT_INSTALL isn't set, resolved once when the module is imported.
+# Assuming this script is running from bin/svunit/main.py or similar structure
+# We want the root of the repo.
+# If run via bin/runSVUnit.py, sys.path[0] might be bin/
+# Let's rely on the location of this file: bin/svunit/main.py
+# root is ../../
+_DEFAULT_SVUNIT_INSTALL = Path(__file__).resolve().parent.parent.parent
+
+@lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the command line parser. It doesn't change between calls, so it is built
+    only once when main() is called repeatedly in the same process.
+    """
     parser = argparse.ArgumentParser(description="SVUnit Python Implementation")
     
     subparsers = parser.add_subparsers(dest="command", help="Sub-commands")
@@ -46,7 +63,10 @@ def main():
     parser.add_argument("--enable-experimental", action="store_true", help="Enable experimental features")
     parser.add_argument("--list-tests", action="store_true", help="List available tests")
 
-    args = parser.parse_args()
+    return parser
+
+def main():
+    args = _build_parser().parse_args()
 
     if args.command == "create":
         creator = UnitTestCreator(
@@ -64,87 +84,89 @@ def main():
     # Default behavior: Run SVUnit
     # Setup paths
     outdir = Path(args.outdir).resolve()
-    if not outdir.exists():
-        outdir.mkdir(parents=True)
+    outdir.mkdir(parents=True, exist_ok=True)
 
     svunit_install = os.environ.get("SVUNIT_INSTALL")
     if not svunit_install:
-        # Assuming this script is running from bin/svunit/main.py or similar structure
-        # We want the root of the repo.
-        # If run via bin/runSVUnit.py, sys.path[0] might be bin/
-        # Let's rely on the location of this file: bin/svunit/main.py
-        # root is ../../
-        svunit_install = Path(__file__).resolve().parent.parent.parent
+        svunit_install = _DEFAULT_SVUNIT_INSTALL
     else:
         svunit_install = Path(svunit_install)
+    # Converted once, the install path is used in several lines of .svunit.f
+    svunit_install = os.fspath(svunit_install)
 
     # Discovery Phase
     print("Scanning for tests...")
     discovery = TestDiscovery(directories=args.directory, tests=args.tests)
-    found_tests = discovery.discover()
+    found_tests, suites = discovery.discover_test_suites()
     
     if not found_tests:
         print("No tests found.")
         return 0
 
     print(f"Found {len(found_tests)} tests.")
-    suites = discovery.get_test_suites()
     
     # Code Generation Phase
     codegen = SvUnitCodeGen()
     generated_test_suites = []
     
-    # Initialize .svunit.f
+    # The working directory is looked up once, for the header and the suite names
+    cwd = os.getcwd()
+    cwd_path = Path(cwd)
+
+    # Contents of .svunit.f, written in one go once all files are generated
     svunit_f_path = outdir / ".svunit.f"
-    with open(svunit_f_path, 'w') as f:
-        f.write(f"+incdir+{Path.cwd()}\n")
-        f.write(f"+incdir+{svunit_install}/svunit_base/junit-xml\n")
-        f.write(f"{svunit_install}/svunit_base/junit-xml/junit_xml.sv\n")
-        f.write(f"+incdir+{svunit_install}/svunit_base\n")
-        f.write(f"{svunit_install}/svunit_base/svunit_pkg.sv\n")
+    parts = [
+        f"+incdir+{cwd}\n",
+        f"+incdir+{svunit_install}/svunit_base/junit-xml\n",
+        f"{svunit_install}/svunit_base/junit-xml/junit_xml.sv\n",
+        f"+incdir+{svunit_install}/svunit_base\n",
+        f"{svunit_install}/svunit_base/svunit_pkg.sv\n",
+    ]
+
+    if args.uvm:
+        parts.append(f"+incdir+{svunit_install}/svunit_base/uvm-mock\n")
+        parts.append(f"{svunit_install}/svunit_base/uvm-mock/svunit_uvm_mock_pkg.sv\n")
+
+    if args.enable_experimental:
+        parts.append(f"+incdir+{svunit_install}/src/experimental/sv\n")
+        parts.append(f"{svunit_install}/src/experimental/sv/svunit.sv\n")
+
+    # Generate Test Suites
+    for suite_dir, tests in suites.items():
+        suite_dir_str = os.fspath(suite_dir)
+        # Create a unique name for the testsuite file based on directory
+        # Perl script uses: $dirID =~ s/[\/\.-]/_/g; $dirID = "." . $dirID;
+        # We need to be careful about relative paths.
+        try:
+            rel_dir = suite_dir.relative_to(cwd_path)
+            dir_id = str(rel_dir).translate(_DIR_ID_TABLE)
+        except ValueError:
+            # If suite_dir is not relative to cwd (e.g. absolute path outside), use full path
+            dir_id = suite_dir_str.translate(_DIR_ID_TABLE)
+            # Remove leading underscore if it comes from root /
+            if dir_id.startswith('_'):
+                dir_id = dir_id[1:]
+
+        ts_filename = f".{dir_id}_testsuite.sv"
+        ts_path = outdir / ts_filename
+        ts_path_str = os.fspath(ts_path)
         
-        if args.uvm:
-             f.write(f"+incdir+{svunit_install}/svunit_base/uvm-mock\n")
-             f.write(f"{svunit_install}/svunit_base/uvm-mock/svunit_uvm_mock_pkg.sv\n")
-
-        if args.enable_experimental:
-             f.write(f"+incdir+{svunit_install}/src/experimental/sv\n")
-             f.write(f"{svunit_install}/src/experimental/sv/svunit.sv\n")
-
-        # Generate Test Suites
-        for suite_dir, tests in suites.items():
-            # Create a unique name for the testsuite file based on directory
-            # Perl script uses: $dirID =~ s/[\/\.-]/_/g; $dirID = "." . $dirID;
-            # We need to be careful about relative paths.
-            try:
-                rel_dir = suite_dir.relative_to(Path.cwd())
-                dir_id = str(rel_dir).replace('/', '_').replace('.', '_').replace('-', '_')
-            except ValueError:
-                # If suite_dir is not relative to cwd (e.g. absolute path outside), use full path
-                dir_id = str(suite_dir).replace('/', '_').replace('.', '_').replace('-', '_')
-                # Remove leading underscore if it comes from root /
-                if dir_id.startswith('_'):
-                    dir_id = dir_id[1:]
-
-            ts_filename = f".{dir_id}_testsuite.sv"
-            ts_path = outdir / ts_filename
-            
-            print(f"Generating {ts_path} for {suite_dir}")
-            codegen.create_testsuite(ts_path, tests)
-            generated_test_suites.append(ts_path)
-            
-            # Add tests to .svunit.f
-            for test in tests:
-                f.write(f"{test}\n")
-            
-            f.write(f"+incdir+{suite_dir}\n")
-            f.write(f"{ts_path}\n")
-
-        # Generate Test Runner
-        tr_path = outdir / ".testrunner.sv" # Perl script generates testrunner.sv then moves to .testrunner.sv
-        print(f"Generating {tr_path}")
-        codegen.create_testrunner(tr_path, generated_test_suites)
-        f.write(f"{tr_path}\n")
+        print(f"Generating {ts_path_str} for {suite_dir_str}")
+        codegen.create_testsuite(ts_path, tests)
+        generated_test_suites.append(ts_path)
+
+        # Add tests to .svunit.f
+        parts.append("".join(f"{test}\n" for test in tests))
+        parts.append(f"+incdir+{suite_dir_str}\n")
+        parts.append(f"{ts_path_str}\n")
+
+    # Generate Test Runner
+    tr_path = outdir / ".testrunner.sv" # Perl script generates testrunner.sv then moves to .testrunner.sv
+    print(f"Generating {tr_path}")
+    codegen.create_testrunner(tr_path, generated_test_suites)
+    parts.append(f"{tr_path}\n")
+
+    svunit_f_path.write_text("".join(parts))
 
     # Simulation Phase
     simulator = None
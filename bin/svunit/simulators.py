@@ -1,7 +1,11 @@
 import abc
+import codecs
 import subprocess
 import os
-from typing import List, Dict, Optional
+import shlex
+import shutil
+import sys
+from typing import List, Dict, NamedTuple, Optional, Tuple
 
 class Simulator(abc.ABC):
     def __init__(self, name: str, executable: str):
@@ -18,18 +22,25 @@ class Simulator(abc.ABC):
         self.outdir = "."
         self.filter = None
         self.list_tests = False
+        # +define+ arguments, built on first use
+        self._defines_args_cache = None
 
     def set_options(self, defines: List[str], filelists: List[str], sim_args: List[str], 
                     compile_args: List[str], elab_args: List[str], uvm: bool, 
                     vhdl_file: str, logfile: str, outdir: str, filter: str, list_tests: bool):
-        self.defines = defines if defines else []
-        self.filelists = filelists if filelists else []
+        # Copied, so adding the UVM define doesn't change the caller's list
+        self.defines = list(defines) if defines else []
+        if uvm:
+            self.defines.append("RUN_SVUNIT_WITH_UVM")
+        self._defines_args_cache = None
+        # Paths used to be expanded by the shell, so environment variables keep working
+        self.filelists = [os.path.expandvars(f) for f in filelists] if filelists else []
         self.sim_args = sim_args if sim_args else []
         self.compile_args = compile_args if compile_args else []
         self.elab_args = elab_args if elab_args else []
         self.uvm = uvm
-        self.vhdl_file = vhdl_file
-        self.logfile = logfile
+        self.vhdl_file = os.path.expandvars(vhdl_file) if vhdl_file else vhdl_file
+        self.logfile = os.path.expandvars(logfile)
         self.outdir = outdir
         self.filter = filter
         self.list_tests = list_tests
@@ -42,38 +53,145 @@ class Simulator(abc.ABC):
         """
         pass
 
-    def _run_command(self, cmd: str) -> bool:
-        print(f"Running: {cmd}")
-        # Using shell=True to handle complex command chaining (&&, | tee, etc.) similar to Perl script
-        # In a more advanced version, we should split this into subprocess calls without shell=True
-        ret = subprocess.call(cmd, shell=True, cwd=self.outdir)
-        return ret == 0
+    def _run_command(self, *cmds: List[str]) -> bool:
+        """
+        Runs the given commands one after another in the output directory,
+        stopping at the first one that fails like a chain of '&&' in a shell would.
+        Each command is an argument list, so no shell is started to parse it.
+        """
+        for cmd in cmds:
+            print(f"Running: {' '.join(shlex.quote(arg) for arg in cmd)}")
+            try:
+                ret = subprocess.call(cmd, cwd=self.outdir)
+            except OSError as e:
+                # Without a shell a missing executable raises instead of failing with 127
+                print(f"Error: Could not run {cmd[0]}: {e.strerror}")
+                return False
+            if ret != 0:
+                return False
+        return True
+
+    def _defines_args(self) -> List[str]:
+        """
+        Returns the defines as '+define+' arguments. They only change with set_options(),
+        so they are built once and reused.
+        """
+        if self._defines_args_cache is None:
+            if self.defines:
+                self._defines_args_cache = _split_args(["+define+" + "+define+".join(self.defines)])
+            else:
+                self._defines_args_cache = []
+        return self._defines_args_cache
+
+    def _run_command_with_log(self, cmd: List[str]) -> bool:
+        """
+        Runs a command in the output directory, copying its output to stdout and to
+        the log file as it comes, like '2>&1 | tee <logfile>' does.
+        """
+        print(f"Running: {' '.join(shlex.quote(arg) for arg in cmd)}")
+        # Whatever was printed before has to come out ahead of the command output
+        stdout = sys.stdout
+        stdout.flush()
+        try:
+            log = open(os.path.join(self.outdir, self.logfile), 'wb')
+        except OSError as e:
+            print(f"Error: Could not open log file {self.logfile}: {e.strerror}")
+            return False
+        with log:
+            try:
+                proc = subprocess.Popen(cmd, cwd=self.outdir, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, bufsize=0)
+            except OSError as e:
+                print(f"Error: Could not run {cmd[0]}: {e.strerror}")
+                return False
+            # Text-only streams, e.g. a StringIO when main() is embedded, get decoded output
+            out = getattr(stdout, 'buffer', None)
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace') if out is None else None
+            with proc:
+                # Unbuffered reads return whatever output is available
+                for chunk in iter(lambda: proc.stdout.read(65536), b''):
+                    if out is not None:
+                        out.write(chunk)
+                        out.flush()
+                    else:
+                        stdout.write(decoder.decode(chunk))
+                    log.write(chunk)
+            if decoder is not None:
+                stdout.write(decoder.decode(b'', final=True))
+        return proc.returncode == 0
+
+def _split_args(args: List[str]) -> List[str]:
+    """
+    Splits user supplied arguments and expands environment variables in them like
+    the shell used to, '-r "+a +b"' passes two arguments and '$PROJ' is expanded.
+    """
+    return [os.path.expandvars(token) for arg in args for token in shlex.split(arg)]
+
+class SimSpec(NamedTuple):
+    """
+    Describes how a simulator that compiles, elaborates and simulates in a single
+    command differs from the others.
+    """
+    # Arguments following the executable
+    pre: Tuple[str, ...]
+    # Arguments added when running with UVM, environment variables are expanded
+    uvm_args: Tuple[str, ...]
+
+class SingleCommandSimulator(Simulator):
+    """
+    Base of the simulators run as a single command, which is built from the
+    SimSpec of the class.
+    """
+    _SPEC = SimSpec(pre=(), uvm_args=())
+
+    def run(self) -> bool:
+        cmd = [self.executable, *self._SPEC.pre, "-l", self.logfile]
+        if self.vhdl_file:
+            cmd += ["-f", self.vhdl_file]
+
+        if self.uvm:
+            cmd += [os.path.expandvars(arg) for arg in self._SPEC.uvm_args]
+
+        for f in self.filelists:
+            cmd += ["-f", f]
+        cmd += ["-f", ".svunit.f"]
+
+        cmd += self._defines_args()
+
+        cmd += _split_args(self.compile_args)
+        cmd += _split_args(self.elab_args)
+        cmd += _split_args(self.sim_args)
+
+        cmd += ["-top", "testrunner"]
+
+        if self.filter:
+            cmd.append(f"+SVUNIT_FILTER={self.filter}")
+
+        if self.list_tests:
+            cmd.append("+SVUNIT_LIST_TESTS")
+
+        return self._run_command(cmd)
 
 class ModelSim(Simulator):
     def __init__(self):
         super().__init__("modelsim", "vsim")
 
     def run(self) -> bool:
-        cmd = ""
-        cmd += "vlib work && "
+        cmds = [["vlib", "work"]]
         if self.vhdl_file:
-            cmd += f"vcom -work work -f {self.vhdl_file} && "
+            cmds.append(["vcom", "-work", "work", "-f", self.vhdl_file])
         
-        cmd += f"vlog -l {self.logfile} "
+        cmd = ["vlog", "-l", self.logfile]
         
-        if self.uvm:
-            self.defines.append("RUN_SVUNIT_WITH_UVM")
-
         for f in self.filelists:
-            cmd += f" -f {f}"
-        cmd += " -f .svunit.f"
+            cmd += ["-f", f]
+        cmd += ["-f", ".svunit.f"]
 
-        if self.defines:
-            cmd += " +define+" + "+define+".join(self.defines)
+        cmd += self._defines_args()
 
         # Add compile args
-        if self.compile_args:
-            cmd += " " + " ".join(self.compile_args)
+        cmd += _split_args(self.compile_args)
+        cmds.append(cmd)
 
         # Simulation command
         # Check if -c, -gui, or -i is present in sim_args
@@ -81,98 +199,39 @@ class ModelSim(Simulator):
         if not has_mode_flag:
             self.sim_args.append("-c")
         
-        vopt_elab_args = f'-voptargs="{" ".join(self.elab_args)}"' if self.elab_args else ""
-        
-        cmd += f" && vsim {vopt_elab_args} {' '.join(self.sim_args)} -lib work -do \"run -all; quit\" -l {self.logfile} testrunner"
+        cmd = ["vsim"]
+        if self.elab_args:
+            cmd.append(f'-voptargs={os.path.expandvars(" ".join(self.elab_args))}')
+        cmd += _split_args(self.sim_args)
+        cmd += ["-lib", "work", "-do", "run -all; quit", "-l", self.logfile, "testrunner"]
         
         if self.filter:
-             cmd += f" +SVUNIT_FILTER={self.filter}"
+             cmd.append(f"+SVUNIT_FILTER={self.filter}")
         
         if self.list_tests:
-             cmd += " +SVUNIT_LIST_TESTS"
+             cmd.append("+SVUNIT_LIST_TESTS")
+        cmds.append(cmd)
 
-        return self._run_command(cmd)
+        return self._run_command(*cmds)
+
+class Irun(SingleCommandSimulator):
+    _SPEC = SimSpec(pre=(), uvm_args=("-uvm",))
 
-class Irun(Simulator):
     def __init__(self):
         super().__init__("irun", "irun")
 
-    def run(self) -> bool:
-        cmd = f"{self.executable} -l {self.logfile} "
-        if self.vhdl_file:
-            cmd += f"-f {self.vhdl_file} "
-        
-        if self.uvm:
-            cmd += " -uvm"
-            self.defines.append("RUN_SVUNIT_WITH_UVM")
-
-        for f in self.filelists:
-            cmd += f" -f {f}"
-        cmd += " -f .svunit.f"
-
-        if self.defines:
-            cmd += " +define+" + "+define+".join(self.defines)
-
-        if self.compile_args:
-            cmd += " " + " ".join(self.compile_args)
-        if self.elab_args:
-            cmd += " " + " ".join(self.elab_args)
-        if self.sim_args:
-            cmd += " " + " ".join(self.sim_args)
-            
-        cmd += " -top testrunner"
-
-        if self.filter:
-             cmd += f" +SVUNIT_FILTER={self.filter}"
-        
-        if self.list_tests:
-             cmd += " +SVUNIT_LIST_TESTS"
-
-        return self._run_command(cmd)
-
 class Xrun(Irun):
     def __init__(self):
         super().__init__()
         self.name = "xrun"
         self.executable = "xrun"
 
-class Vcs(Simulator):
+class Vcs(SingleCommandSimulator):
+    _SPEC = SimSpec(pre=("-R", "-sverilog"), uvm_args=("-ntb_opts", "uvm"))
+
     def __init__(self):
         super().__init__("vcs", "vcs")
 
-    def run(self) -> bool:
-        cmd = f"{self.executable} -R -sverilog -l {self.logfile} "
-        if self.vhdl_file:
-            cmd += f"-f {self.vhdl_file} "
-        
-        if self.uvm:
-            cmd += " -ntb_opts uvm"
-            self.defines.append("RUN_SVUNIT_WITH_UVM")
-
-        for f in self.filelists:
-            cmd += f" -f {f}"
-        cmd += " -f .svunit.f"
-
-        if self.defines:
-            cmd += " +define+" + "+define+".join(self.defines)
-
-        if self.compile_args:
-            cmd += " " + " ".join(self.compile_args)
-        if self.elab_args:
-            cmd += " " + " ".join(self.elab_args)
-        if self.sim_args:
-            cmd += " " + " ".join(self.sim_args)
-            
-        cmd += " -top testrunner"
-
-        if self.filter:
-             cmd += f" +SVUNIT_FILTER={self.filter}"
-        
-        if self.list_tests:
-             cmd += " +SVUNIT_LIST_TESTS"
-
-        return self._run_command(cmd)
-
 class Verilator(Simulator):
     def __init__(self):
         super().__init__("verilator", "verilator")
@@ -185,30 +244,25 @@ class Verilator(Simulator):
             print("Argument error: cannot run Verilator with VHDL")
             return False
 
-        cmd = "verilator --binary --top-module testrunner"
+        cmd = ["verilator", "--binary", "--top-module", "testrunner"]
         
-        if self.compile_args:
-            cmd += " " + " ".join(self.compile_args)
-        if self.elab_args:
-            cmd += " " + " ".join(self.elab_args)
+        cmd += _split_args(self.compile_args)
+        cmd += _split_args(self.elab_args)
 
         for f in self.filelists:
-            cmd += f" -f {f}"
-        cmd += " -f .svunit.f"
+            cmd += ["-f", f]
+        cmd += ["-f", ".svunit.f"]
 
-        if self.defines:
-            cmd += " +define+" + "+define+".join(self.defines)
+        cmd += self._defines_args()
 
         # Simulation execution
-        sim_args_str = " ".join(self.sim_args) if self.sim_args else ""
+        sim_cmd = ["obj_dir/Vtestrunner"] + _split_args(self.sim_args)
         if self.filter:
-            sim_args_str += f" +SVUNIT_FILTER={self.filter}"
+            sim_cmd.append(f"+SVUNIT_FILTER={self.filter}")
         if self.list_tests:
-            sim_args_str += " +SVUNIT_LIST_TESTS"
-
-        cmd += f" && obj_dir/Vtestrunner {sim_args_str} 2>&1 | tee {self.logfile}"
+            sim_cmd.append("+SVUNIT_LIST_TESTS")
 
-        return self._run_command(cmd)
+        return self._run_command(cmd) and self._run_command_with_log(sim_cmd)
 
 class Xsim(Simulator):
     def __init__(self):
@@ -223,145 +277,93 @@ class Xsim(Simulator):
         
         # Let's modify the file in place for now as per Perl script behavior
         svunit_f_path = os.path.join(self.outdir, ".svunit.f")
-        if os.path.exists(svunit_f_path):
-            with open(svunit_f_path, 'r') as f:
+        try:
+            with open(svunit_f_path, 'rb') as f:
                 content = f.read()
-            content = content.replace("+incdir+", "--include ")
-            with open(svunit_f_path, 'w') as f:
-                f.write(content)
-
-        cmd = ""
+        except FileNotFoundError:
+            content = b""
+        # An already converted file is left untouched
+        if b"+incdir+" in content:
+            with open(svunit_f_path, 'wb') as f:
+                f.write(content.replace(b"+incdir+", b"--include "))
+
+        cmds = []
         if self.vhdl_file:
-            cmd += f"xvhdl -f {self.vhdl_file} && "
+            cmds.append(["xvhdl", "-f", self.vhdl_file])
         
-        cmd += f"xvlog --sv --log {self.logfile} "
+        cmd = ["xvlog", "--sv", "--log", self.logfile]
         
         if self.uvm:
-            cmd += " --lib uvm"
-            self.defines.append("RUN_SVUNIT_WITH_UVM")
+            cmd += ["--lib", "uvm"]
 
         for f in self.filelists:
-            cmd += f" -f {f}"
-        cmd += " -f .svunit.f"
+            cmd += ["-f", f]
+        cmd += ["-f", ".svunit.f"]
 
-        if self.defines:
-            cmd += " " + " ".join([f"--define {d}" for d in self.defines])
+        for d in self.defines:
+            cmd += ["--define", os.path.expandvars(d)]
 
-        if self.compile_args:
-            cmd += " " + " ".join(self.compile_args)
+        cmd += _split_args(self.compile_args)
+        cmds.append(cmd)
         
-        cmd += f" && xelab testrunner"
-        if self.elab_args:
-            cmd += " " + " ".join(self.elab_args)
+        cmds.append(["xelab", "testrunner"] + _split_args(self.elab_args))
             
-        cmd += f" && xsim"
-        if self.sim_args:
-            cmd += " " + " ".join(self.sim_args)
-        
-        cmd += f" --R --log {self.logfile} testrunner"
+        cmd = ["xsim"] + _split_args(self.sim_args)
+        cmd += ["--R", "--log", self.logfile, "testrunner"]
 
         if self.filter:
-             cmd += f" --testplusarg SVUNIT_FILTER={self.filter}"
+             cmd += ["--testplusarg", f"SVUNIT_FILTER={self.filter}"]
         
         if self.list_tests:
-             cmd += " --testplusarg SVUNIT_LIST_TESTS"
+             cmd += ["--testplusarg", "SVUNIT_LIST_TESTS"]
+        cmds.append(cmd)
 
-        return self._run_command(cmd)
+        return self._run_command(*cmds)
+
+class Dsim(SingleCommandSimulator):
+    _SPEC = SimSpec(pre=(), uvm_args=(
+        "+incdir+$UVM_HOME/src", "$UVM_HOME/src/uvm.sv", "-sv_lib", "$UVM_HOME/src/dpi/libuvm_dpi.so"))
 
-class Dsim(Simulator):
     def __init__(self):
         super().__init__("dsim", "dsim")
 
-    def run(self) -> bool:
-        cmd = f"{self.executable} -l {self.logfile} "
-        if self.vhdl_file:
-            cmd += f"-f {self.vhdl_file} "
-        
-        if self.uvm:
-            cmd += ' +incdir+$UVM_HOME/src $UVM_HOME/src/uvm.sv -sv_lib $UVM_HOME/src/dpi/libuvm_dpi.so'
-            self.defines.append("RUN_SVUNIT_WITH_UVM")
-
-        for f in self.filelists:
-            cmd += f" -f {f}"
-        cmd += " -f .svunit.f"
-
-        if self.defines:
-            cmd += " +define+" + "+define+".join(self.defines)
+class Qrun(SingleCommandSimulator):
+    # Assuming qrun behaves similarly to others, Perl script treats it in the 'else' block
+    _SPEC = SimSpec(pre=(), uvm_args=())
 
-        if self.compile_args:
-            cmd += " " + " ".join(self.compile_args)
-        if self.elab_args:
-            cmd += " " + " ".join(self.elab_args)
-        if self.sim_args:
-            cmd += " " + " ".join(self.sim_args)
-            
-        cmd += " -top testrunner"
-
-        if self.filter:
-             cmd += f" +SVUNIT_FILTER={self.filter}"
-        
-        if self.list_tests:
-             cmd += " +SVUNIT_LIST_TESTS"
-
-        return self._run_command(cmd)
-
-class Qrun(Simulator):
     def __init__(self):
         super().__init__("qrun", "qrun")
 
-    def run(self) -> bool:
-        # Assuming qrun behaves similarly to others, Perl script treats it in the 'else' block
-        cmd = f"{self.executable} -l {self.logfile} "
-        if self.vhdl_file:
-            cmd += f"-f {self.vhdl_file} "
-        
-        if self.uvm:
-            self.defines.append("RUN_SVUNIT_WITH_UVM")
-
-        for f in self.filelists:
-            cmd += f" -f {f}"
-        cmd += " -f .svunit.f"
-
-        if self.defines:
-            cmd += " +define+" + "+define+".join(self.defines)
-
-        if self.compile_args:
-            cmd += " " + " ".join(self.compile_args)
-        if self.elab_args:
-            cmd += " " + " ".join(self.elab_args)
-        if self.sim_args:
-            cmd += " " + " ".join(self.sim_args)
-            
-        cmd += " -top testrunner"
-
-        if self.filter:
-             cmd += f" +SVUNIT_FILTER={self.filter}"
-        
-        if self.list_tests:
-             cmd += " +SVUNIT_LIST_TESTS"
-
-        return self._run_command(cmd)
-
+# Simulator classes by the names accepted on the command line
+_SIMULATORS = {
+    "modelsim": ModelSim,
+    "questa": ModelSim,
+    "irun": Irun,
+    "ius": Irun,
+    "xrun": Xrun,
+    "xcelium": Xrun,
+    "vcs": Vcs,
+    "verilator": Verilator,
+    "xsim": Xsim,
+    "dsim": Dsim,
+    "qrun": Qrun,
+}
+
+# Executables looked up in PATH by detect_simulator(), in order of preference
+_DETECTED_SIMULATORS = [
+    ("xrun", Xrun),
+    ("irun", Irun),
+    ("qrun", Qrun),
+    ("vsim", ModelSim),
+    ("vcs", Vcs),
+    ("dsim", Dsim),
+    ("verilator", Verilator),
+    ("xsim", Xsim),
+]
 
 def get_simulator(name: str) -> Optional[Simulator]:
     name = name.lower()
-    if name == "modelsim" or name == "questa":
-        return ModelSim()
-    elif name == "irun" or name == "ius":
-        return Irun()
-    elif name == "xrun" or name == "xcelium":
-        return Xrun()
-    elif name == "vcs":
-        return Vcs()
-    elif name == "verilator":
-        return Verilator()
-    elif name == "xsim":
-        return Xsim()
-    elif name == "dsim":
-        return Dsim()
-    elif name == "qrun":
-        return Qrun()
-    elif name == "riviera":
+    if name == "riviera":
         # Riviera uses same logic as ModelSim in Perl script
         sim = ModelSim()
         sim.name = "riviera"
@@ -371,20 +373,12 @@ def get_simulator(name: str) -> Optional[Simulator]:
         # So it seems it uses vsim command as well? Or maybe 'riviera' command?
         # The Perl script uses 'vsim' for both.
         return sim
-    return None
+    sim_class = _SIMULATORS.get(name)
+    return sim_class() if sim_class else None
 
 def detect_simulator() -> Optional[Simulator]:
-    # Check PATH for simulators
-    sims = ["xrun", "irun", "qrun", "vsim", "vcs", "dsim", "verilator", "xsim"]
-    for sim in sims:
-        if subprocess.call(f"which {sim} > /dev/null 2>&1", shell=True) == 0:
-            # Map executable to simulator name
-            if sim == "vsim": return ModelSim()
-            if sim == "xrun": return Xrun()
-            if sim == "irun": return Irun()
-            if sim == "vcs": return Vcs()
-            if sim == "verilator": return Verilator()
-            if sim == "xsim": return Xsim()
-            if sim == "dsim": return Dsim()
-            if sim == "qrun": return Qrun()
+    # Check PATH for simulators, without starting a shell for each lookup
+    for exe, sim_class in _DETECTED_SIMULATORS:
+        if shutil.which(exe):
+            return sim_class()
     return None
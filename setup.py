@@ -1,11 +1,32 @@
+import os
 from setuptools import setup, find_packages
 
+# The parsing, code generation and discovery modules can optionally be compiled
+# with Cython by setting SVUNIT_CYTHONIZE=1. The modules stay plain Python, so
+# the package works unchanged when the compiled extensions are not available.
+ext_modules = []
+if os.environ.get("SVUNIT_CYTHONIZE"):
+    from Cython.Build import cythonize
+    ext_modules = cythonize(
+        [
+            "bin/svunit/codegen.py",
+            "bin/svunit/creator.py",
+            "bin/svunit/discovery.py",
+        ],
+        # C types are declared in the .pxd files next to the modules
+        compiler_directives={"language_level": 3, "annotation_typing": False},
+    )
+
 setup(
     name="svunit",
     version="0.1.0",
     packages=find_packages(where="bin"),
     package_dir={"": "bin"},
     install_requires=[],
+    extras_require={
+        "re2": ["google-re2"],
+    },
+    ext_modules=ext_modules,
     entry_points={
         "console_scripts": [
             "runSVUnit.py=svunit.main:main",
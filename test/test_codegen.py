@@ -0,0 +1,54 @@
+import pathlib
+import sys
+
+import pytest
+
+# The Python implementation lives in bin/ and isn't installed as a package
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / 'bin'))
+
+from svunit.codegen import _find_unit_test_module
+
+
+@pytest.mark.parametrize('content, expected', [
+    (b'module foo_unit_test;\n', 'foo_unit_test'),
+    (b'  module foo_unit_test;\n', 'foo_unit_test'),
+    (b'module foo_unit_test\n;\n', 'foo_unit_test'),
+    # Comments before the declaration
+    (b'// module a_unit_test;\n/* module b_unit_test; */\nmodule c_unit_test;\n', 'c_unit_test'),
+    (b'/* comment */ module foo_unit_test;\n', 'foo_unit_test'),
+    # Comments between the tokens
+    (b'module /* c */ foo_unit_test /* c */ ;\n', 'foo_unit_test'),
+    (b'module/*c*/foo_unit_test;\n', 'foo_unit_test'),
+    (b'module // c\n  foo_unit_test;\n', 'foo_unit_test'),
+    # Lifetime keywords
+    (b'module automatic foo_unit_test;\n', 'foo_unit_test'),
+    (b'module static foo_unit_test;\n', 'foo_unit_test'),
+    # The first unit test module wins
+    (b'module a_unit_test;\nendmodule\nmodule b_unit_test;\n', 'a_unit_test'),
+])
+def test_find_unit_test_module(content, expected):
+    assert _find_unit_test_module(content) == expected
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    # Not at the start of a line
+    b'foo module foo_unit_test;\n',
+    b'foo /*\n*/ module foo_unit_test;\n',
+    # Not a unit test name
+    b'module foo;\n',
+    b'module _unit_test;\n',
+    b'module foo_unit_test_bar;\n',
+    b'modulefoo_unit_test;\n',
+    # Not a plain declaration
+    b'module foo_unit_test #(1);\n',
+    b'module foo_unit_test\n',
+    # Inside comments
+    b'// module foo_unit_test;\n',
+    b'/* module foo_unit_test; */\n',
+    # Everything after an unterminated block comment is part of the comment
+    b'/* module foo_unit_test;\n',
+    b'/* unterminated\nmodule foo_unit_test;\n',
+])
+def test_find_unit_test_module_not_found(content):
+    assert _find_unit_test_module(content) is None